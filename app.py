@@ -1,9 +1,13 @@
 import streamlit as st
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 import pandas as pd
-import plotly.graph_objects as go
-import plotly.express as px
 import numpy as np
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 st.set_page_config(
     page_title="Dashboard Scoring Crédit - Accessible WCAG",
@@ -31,13 +35,81 @@ st.markdown("""
 
 API_URL = "https://api-scoring-credit-final.onrender.com"
 
+# Import différé de Plotly (uniquement nécessaire pour l'analyse)
+@st.cache_resource
+def load_plotly():
+    import plotly.graph_objects as go
+    import plotly.express as px
+    return go, px
+
+# Couleurs des décisions (graphiques)
+DECISION_COLORS = {'ACCORD': '#00CC00', 'REFUS': '#FF4B4B'}
+
+# Session HTTP partagée (keep-alive + retries), une par politique de retry
+@st.cache_resource
+def get_session(retries=2):
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=4,
+        pool_maxsize=4,
+        max_retries=Retry(total=retries, backoff_factor=0.2)
+    )
+    session.mount("https://", adapter)
+    return session
+
+# Réveil de l'API Render en arrière-plan (démarrage à froid ~30 s)
+def warm_up_api():
+    try:
+        get_session().get(f"{API_URL}/status", timeout=30)
+    except:
+        pass
+
+@st.cache_resource
+def start_api_warmup():
+    thread = threading.Thread(target=warm_up_api, daemon=True)
+    add_script_run_ctx(thread)
+    thread.start()
+    return thread
+
+start_api_warmup()
+
+# Statut API et infos modèle : appels parallèles, mis en cache (évite deux allers-retours à chaque rerun)
+# Vérification courte et sans retry : seul le thread de réveil attend le démarrage à froid
+BOOTSTRAP_TIMEOUT = 2
+
+@st.cache_data(ttl=60)
+def bootstrap():
+    session = get_session(retries=0)
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        status_future = executor.submit(session.get, f"{API_URL}/status", timeout=BOOTSTRAP_TIMEOUT)
+        model_future = executor.submit(session.get, f"{API_URL}/model/info", timeout=BOOTSTRAP_TIMEOUT)
+    # Un statut indisponible lève (non mis en cache) ; des infos modèle indisponibles donnent None
+    api_status = status_future.result().json()
+    try:
+        model_info = model_future.result().json()
+    except:
+        model_info = None
+    return api_status, model_info
+
+# Prédiction et explication SHAP : déterministes pour un client donné
+@st.cache_data(ttl=3600, max_entries=512, show_spinner=False)
+def get_prediction(client_id, features_tuple):
+    response = get_session().post(f"{API_URL}/predict", json={"features": list(features_tuple)}, timeout=10)
+    response.raise_for_status()
+    return response.json()
+
+@st.cache_data(ttl=3600, max_entries=512, show_spinner=False)
+def get_explanation(client_id, features_tuple):
+    response = get_session().post(f"{API_URL}/explain", json={"features": list(features_tuple)}, timeout=10)
+    response.raise_for_status()
+    return response.json()
+
 # Récupération du seuil optimal depuis l'API
 OPTIMAL_THRESHOLD = 0.09  # Valeur par défaut
 
 # Vérification API
 try:
-    response = requests.get(f"{API_URL}/status", timeout=2)
-    api_status = response.json()
+    api_status, model_info = bootstrap()
     api_ok = api_status['status'] == 'operational'
 except:
     api_ok = False
@@ -47,40 +119,147 @@ st.title("💳 Dashboard Scoring Crédit - Prêt à Dépenser")
 st.caption("Interface d'analyse de crédit accessible - Compatible WCAG 2.1")
 
 if not api_ok:
-    st.error("⚠️ API non accessible. Veuillez patienter ou relancer.")
-    st.stop()
-
-# Infos modèle et récupération du vrai seuil
-try:
-    model_info = requests.get(f"{API_URL}/model/info").json()
-    # Récupération du seuil depuis l'API si disponible
+    # API en cours de réveil : le tableau de bord reste utilisable, l'analyse sera disponible ensuite
+    st.warning("⏳ API en cours de démarrage... L'analyse sera disponible dans quelques instants. Seuil par défaut: 9%")
+elif model_info is None:
+    st.warning("Modèle en chargement... Seuil par défaut: 9%")
+else:
+    # Infos modèle et récupération du vrai seuil depuis l'API si disponible
     if 'optimal_threshold' in model_info:
         OPTIMAL_THRESHOLD = model_info['optimal_threshold']
     st.success(f"✅ Modèle connecté | Features: {model_info.get('num_features', 254)} | Seuil: {OPTIMAL_THRESHOLD:.1%}")
-except:
-    st.warning("Modèle en chargement... Seuil par défaut: 9%")
 
 # Chargement des données
-@st.cache_data
+NON_FEATURE_COLUMNS = ('SK_ID_CURR', 'RISK_SCORE', 'DECISION', 'REAL_TARGET')
+
+TEST_DATA_CSV = "data/all_clients_test_sample.csv"
+TEST_DATA_PARQUET = "data/all_clients_test_sample.v2.parquet"  # v2 : features en pleine précision
+
+def parquet_is_fresh():
+    # Le Parquet n'est valable que s'il est plus récent que le CSV source
+    if not os.path.exists(TEST_DATA_PARQUET):
+        return False
+    if not os.path.exists(TEST_DATA_CSV):
+        return True
+    return os.path.getmtime(TEST_DATA_PARQUET) >= os.path.getmtime(TEST_DATA_CSV)
+
+def read_test_frame():
+    # Parquet conserve les types réduits : lecture directe si à jour
+    if parquet_is_fresh():
+        try:
+            return pd.read_parquet(TEST_DATA_PARQUET)
+        except:
+            pass  # Fichier illisible : reconstruction depuis le CSV
+    
+    df = pd.read_csv(TEST_DATA_CSV)
+    # Réduction des types des seules colonnes affichées/agrégées ;
+    # les features du modèle restent en float64 pour ne pas altérer les entrées de l'API
+    df['RISK_SCORE'] = df['RISK_SCORE'].astype(np.float32)
+    df['SK_ID_CURR'] = df['SK_ID_CURR'].astype(np.int32)
+    df['REAL_TARGET'] = df['REAL_TARGET'].astype(np.int8)
+    df['DECISION'] = df['DECISION'].astype('category')
+    
+    # Construction du Parquet pour les prochains démarrages (écriture atomique)
+    tmp_path = f"{TEST_DATA_PARQUET}.{os.getpid()}.tmp"
+    try:
+        df.to_parquet(tmp_path, compression="snappy", index=False)
+        os.replace(tmp_path, TEST_DATA_PARQUET)
+    except:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return df
+
+@st.cache_resource
 def load_test_data():
     try:
-        df = pd.read_csv("data/all_clients_test_sample.csv")
-        return df
+        df = read_test_frame()
+        # Matrice des features indexée par SK_ID_CURR (lookup O(1) au clic),
+        # en float64 : les valeurs envoyées à l'API sont celles des données sources
+        feature_cols = [c for c in df.columns if c not in NON_FEATURE_COLUMNS]
+        feature_matrix = df[feature_cols].to_numpy(dtype=np.float64)
+        id_to_row = {int(x): i for i, x in enumerate(df['SK_ID_CURR'].values)}
+        # Distribution des risques triée (positionnement par recherche binaire) et histogramme
+        sorted_risks = np.sort(df['RISK_SCORE'].dropna().to_numpy(dtype=np.float32))
+        hist_counts, hist_edges = np.histogram(sorted_risks, bins=50)
+        hist_counts, hist_edges = hist_counts.astype(np.int32), hist_edges.astype(np.float32)
+        # Âges triés pour le filtrage des clients similaires par recherche binaire
+        age_sort_idx, sorted_ages = None, None
+        if 'DAYS_BIRTH' in df.columns:
+            ages = (-df['DAYS_BIRTH'].to_numpy(dtype=np.float32) / 365.25).astype(np.float32)
+            age_sort_idx = np.argsort(ages, kind='stable')
+            sorted_ages = ages[age_sort_idx]
+        # Liste triée des identifiants clients pour la sélection
+        client_ids = np.sort(df['SK_ID_CURR'].unique()).tolist()
+        return (df, feature_matrix, id_to_row, feature_cols, sorted_risks, hist_counts, hist_edges,
+                age_sort_idx, sorted_ages, client_ids)
     except:
         st.error("Erreur chargement données")
         return None
 
-test_clients = load_test_data()
+test_data = load_test_data()
 
-if test_clients is None:
+if test_data is None:
     st.error("Données non disponibles")
     st.stop()
 
+(test_clients, feature_matrix, id_to_row, feature_cols,
+ sorted_risks, hist_counts, hist_edges,
+ age_sort_idx, sorted_ages, client_ids) = test_data
+
+def similar_indices(age_min, age_max):
+    lo = np.searchsorted(sorted_ages, age_min, side='left')
+    hi = np.searchsorted(sorted_ages, age_max, side='right')
+    return age_sort_idx[lo:hi]
+
+# Scoring groupé des clients similaires (endpoint /predict_batch)
+MAX_BATCH_CLIENTS = 500
+
+def similar_client_ids(age_min, age_max):
+    idx = similar_indices(age_min, age_max)
+    if len(idx) > MAX_BATCH_CLIENTS:
+        idx = np.sort(np.random.default_rng(42).choice(idx, MAX_BATCH_CLIENTS, replace=False))
+    return tuple(int(i) for i in test_clients['SK_ID_CURR'].to_numpy()[idx])
+
+@st.cache_data(ttl=600, show_spinner=False)
+def predict_batch_available():
+    response = get_session().post(f"{API_URL}/predict_batch", json={"features_batch": []}, timeout=10)
+    return response.ok
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def predict_many(ids_tuple):
+    # Lignes en pleine précision (float64), comme pour /predict
+    rows = feature_matrix.take([id_to_row[i] for i in ids_tuple], axis=0).astype(np.float64, copy=False)
+    response = get_session().post(f"{API_URL}/predict_batch", json={"features_batch": rows.tolist()}, timeout=30)
+    response.raise_for_status()
+    predictions = response.json()["predictions"]
+    if len(predictions) != len(ids_tuple):
+        raise ValueError(f"/predict_batch a renvoyé {len(predictions)} prédictions pour {len(ids_tuple)} clients")
+    return {i: p["risk_score"] for i, p in zip(ids_tuple, predictions)}
+
+# Échantillon fixe pour l'analyse bi-variée (tiré une seule fois)
+@st.cache_data
+def get_scatter_sample(n=1000):
+    return test_clients.sample(n=min(n, len(test_clients)), random_state=42).reset_index(drop=True)
+
+# Statistiques des clients similaires, mises en cache par tranche d'âge
+@st.cache_data
+def similar_group_stats(age_min, age_max):
+    similar_clients = test_clients.iloc[similar_indices(age_min, age_max)]
+    # Une seule réduction sur les trois colonnes du groupe
+    means = similar_clients[['RISK_SCORE', 'REAL_TARGET']].assign(
+        ACCORD=similar_clients['DECISION'] == 'ACCORD'
+    ).mean()
+    return {
+        "count": len(similar_clients),
+        "avg_risk": means['RISK_SCORE'],
+        "approval_rate": means['ACCORD'],
+        "default_rate": means['REAL_TARGET']
+    }
+
 # SIDEBAR - Sélection client
 st.sidebar.header("🔍 Recherche Client")
 st.sidebar.markdown("**Navigation accessible** - Utilisez Tab pour naviguer")
 
-client_ids = sorted(test_clients['SK_ID_CURR'].unique())
 selected_client_id = st.sidebar.selectbox(
     "Sélectionner un client par ID",
     options=client_ids,
@@ -111,27 +290,97 @@ income_filter = st.sidebar.slider(
     help="Échelle logarithmique des revenus"
 )
 
+# Analyse bi-variée : fragment rerun seul lors du changement d'axes
+@st.fragment
+def bivariate_section(sample_clients, client_row, selected_client_id):
+    go, _ = load_plotly()
+    
+    # Sélection des features pour l'analyse
+    numeric_features = ['EXT_SOURCE_1', 'EXT_SOURCE_2', 'EXT_SOURCE_3', 
+                      'DAYS_BIRTH', 'AMT_CREDIT', 'AMT_INCOME_TOTAL', 
+                      'AMT_ANNUITY', 'DAYS_EMPLOYED']
+    
+    available_features = [f for f in numeric_features if f in test_clients.columns]
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        feature_x = st.selectbox(
+            "Axe X - Première variable",
+            options=available_features,
+            index=0,
+            help="Sélectionnez la variable pour l'axe horizontal"
+        )
+    
+    with col2:
+        feature_y = st.selectbox(
+            "Axe Y - Deuxième variable",
+            options=available_features,
+            index=1,
+            help="Sélectionnez la variable pour l'axe vertical"
+        )
+    
+    # Graphique bi-varié (rendu WebGL, une trace par décision)
+    fig_scatter = go.Figure()
+    for decision_label, decision_color in DECISION_COLORS.items():
+        group = sample_clients[sample_clients['DECISION'] == decision_label]
+        fig_scatter.add_trace(go.Scattergl(
+            x=group[feature_x].to_numpy(dtype=np.float32),
+            y=group[feature_y].to_numpy(dtype=np.float32),
+            mode='markers',
+            marker=dict(color=decision_color, line=dict(width=0)),
+            opacity=0.6,
+            name=decision_label
+        ))
+    
+    # Ajouter le point du client actuel (en WebGL : une trace SVG serait masquée par la couche WebGL)
+    fig_scatter.add_trace(go.Scattergl(
+        x=[client_row[feature_x]],
+        y=[client_row[feature_y]],
+        mode='markers',
+        marker=dict(size=20, color='blue', symbol='star'),
+        name=f'Client #{selected_client_id}'
+    ))
+    
+    fig_scatter.update_layout(
+        title=f"Analyse bi-variée : {feature_x} vs {feature_y}",
+        height=500,
+        uirevision=f"{feature_x}|{feature_y}",
+        xaxis_title=feature_x,
+        yaxis_title=feature_y
+    )
+    
+    st.plotly_chart(fig_scatter, use_container_width=True)
+    st.caption(f"Graphique de dispersion : L'étoile bleue représente le client analysé")
+
 # Bouton Analyser
 if st.sidebar.button("📊 ANALYSER LE CLIENT", type="primary", use_container_width=True):
     
+    go, px = load_plotly()
+    
     with st.spinner("Analyse en cours... Veuillez patienter"):
         try:
-            client_row = test_clients[test_clients['SK_ID_CURR'] == selected_client_id].iloc[0]
+            row_idx = id_to_row[int(selected_client_id)]
+            client_row = test_clients.iloc[row_idx]
+            features = tuple(feature_matrix[row_idx].tolist())
+            client_id = int(selected_client_id)
             
-            features_to_drop = ['SK_ID_CURR', 'RISK_SCORE', 'DECISION', 'REAL_TARGET']
-            features_list = [col for col in client_row.index if col not in features_to_drop]
-            features = client_row[features_list].values.tolist()
+            # Appels API en parallèle (prédiction + explication), mis en cache par client
+            with ThreadPoolExecutor(
+                max_workers=2,
+                initializer=add_script_run_ctx,
+                initargs=(None, get_script_run_ctx())
+            ) as executor:
+                future_predict = executor.submit(get_prediction, client_id, features)
+                future_explain = executor.submit(get_explanation, client_id, features)
             
-            # Appel API
-            response = requests.post(
-                f"{API_URL}/predict",
-                json={"features": features},
-                timeout=10
-            )
+            try:
+                result = future_predict.result()
+                predict_error = None
+            except requests.HTTPError as e:
+                result = None
+                predict_error = e.response.status_code
             
-            if response.status_code == 200:
-                result = response.json()
-                
+            if result is not None:
                 # Header avec ID client
                 st.header(f"📋 Analyse du Client #{selected_client_id}")
                 st.markdown("---")
@@ -205,7 +454,7 @@ if st.sidebar.button("📊 ANALYSER LE CLIENT", type="primary", use_container_wi
                     plot_bgcolor='rgba(0,0,0,0)'
                 )
                 
-                st.plotly_chart(fig_gauge, use_container_width=True)
+                st.plotly_chart(fig_gauge, use_container_width=True, config={"staticPlot": True})
                 st.caption(f"Jauge de risque : Seuil de décision à {OPTIMAL_THRESHOLD:.1%}. Vert = crédit accordé, Rouge = crédit refusé")
                 
                 # SECTION 3 : Comparaison avec autres clients
@@ -217,11 +466,11 @@ if st.sidebar.button("📊 ANALYSER LE CLIENT", type="primary", use_container_wi
                     # Distribution des risques
                     fig_hist = go.Figure()
                     
-                    # Tous les clients
-                    all_risks = test_clients['RISK_SCORE'].dropna()
-                    fig_hist.add_trace(go.Histogram(
-                        x=all_risks,
-                        nbinsx=50,
+                    # Tous les clients (histogramme précalculé)
+                    fig_hist.add_trace(go.Bar(
+                        x=(hist_edges[:-1] + hist_edges[1:]) / 2,
+                        y=hist_counts,
+                        width=np.diff(hist_edges),
                         name='Tous les clients',
                         opacity=0.6,
                         marker_color='lightblue'
@@ -275,97 +524,55 @@ if st.sidebar.button("📊 ANALYSER LE CLIENT", type="primary", use_container_wi
                         font={'size': 14}
                     )
                     
-                    st.plotly_chart(fig_pie, use_container_width=True)
+                    st.plotly_chart(fig_pie, use_container_width=True, config={"staticPlot": True})
                     st.caption("Diagramme circulaire : Proportion de crédits accordés vs refusés")
                 
                 # SECTION 4 : Analyse bi-variée
                 st.subheader("4️⃣ Analyse bi-variée des caractéristiques")
                 
-                # Sélection des features pour l'analyse
-                numeric_features = ['EXT_SOURCE_1', 'EXT_SOURCE_2', 'EXT_SOURCE_3', 
-                                  'DAYS_BIRTH', 'AMT_CREDIT', 'AMT_INCOME_TOTAL', 
-                                  'AMT_ANNUITY', 'DAYS_EMPLOYED']
-                
-                available_features = [f for f in numeric_features if f in test_clients.columns]
-                
-                col1, col2 = st.columns(2)
-                with col1:
-                    feature_x = st.selectbox(
-                        "Axe X - Première variable",
-                        options=available_features,
-                        index=0,
-                        help="Sélectionnez la variable pour l'axe horizontal"
-                    )
-                
-                with col2:
-                    feature_y = st.selectbox(
-                        "Axe Y - Deuxième variable",
-                        options=available_features,
-                        index=1,
-                        help="Sélectionnez la variable pour l'axe vertical"
-                    )
-                
-                # Graphique bi-varié
-                sample_size = min(1000, len(test_clients))
-                sample_clients = test_clients.sample(n=sample_size, random_state=42)
-                
-                fig_scatter = px.scatter(
-                    sample_clients,
-                    x=feature_x,
-                    y=feature_y,
-                    color='DECISION',
-                    color_discrete_map={'ACCORD': '#00CC00', 'REFUS': '#FF4B4B'},
-                    title=f"Analyse bi-variée : {feature_x} vs {feature_y}",
-                    opacity=0.6
-                )
-                
-                # Ajouter le point du client actuel
-                fig_scatter.add_scatter(
-                    x=[client_row[feature_x]],
-                    y=[client_row[feature_y]],
-                    mode='markers',
-                    marker=dict(size=20, color='blue', symbol='star'),
-                    name=f'Client #{selected_client_id}'
-                )
-                
-                fig_scatter.update_layout(
-                    height=500,
-                    xaxis_title=feature_x,
-                    yaxis_title=feature_y
-                )
-                
-                st.plotly_chart(fig_scatter, use_container_width=True)
-                st.caption(f"Graphique de dispersion : L'étoile bleue représente le client analysé")
+                bivariate_section(get_scatter_sample(), client_row, selected_client_id)
                 
                 # SECTION 5 : Comparaison avec groupe similaire
                 st.subheader("5️⃣ Comparaison avec clients similaires")
                 
                 # Filtrer les clients similaires
-                if 'DAYS_BIRTH' in test_clients.columns:
+                if sorted_ages is not None:
                     client_age = -client_row['DAYS_BIRTH'] / 365.25
                     age_min, age_max = age_filter
                     
-                    similar_clients = test_clients[
-                        ((-test_clients['DAYS_BIRTH'] / 365.25) >= age_min) &
-                        ((-test_clients['DAYS_BIRTH'] / 365.25) <= age_max)
-                    ]
+                    group_stats = similar_group_stats(age_min, age_max)
                     
-                    st.info(f"📊 Comparaison avec {len(similar_clients)} clients d'âge similaire ({age_min}-{age_max} ans)")
+                    st.info(f"📊 Comparaison avec {group_stats['count']} clients d'âge similaire ({age_min}-{age_max} ans)")
                     
                     # Statistiques du groupe
                     col1, col2, col3 = st.columns(3)
                     
                     with col1:
-                        avg_risk = similar_clients['RISK_SCORE'].mean()
+                        avg_risk = group_stats['avg_risk']
+                        batch_size = None
+                        # Risque moyen recalculé par le modèle si le scoring groupé est disponible
+                        try:
+                            if predict_batch_available():
+                                batch_risks = predict_many(similar_client_ids(age_min, age_max))
+                                avg_risk = float(np.mean(list(batch_risks.values())))
+                                batch_size = len(batch_risks)
+                        except:
+                            pass
+                        
+                        is_sample = batch_size is not None and batch_size < group_stats['count']
                         st.metric(
                             "Risque moyen du groupe",
                             f"{avg_risk:.1%}",
                             delta=f"{(risk - avg_risk)*100:.1f}%",
-                            help="Différence avec la moyenne du groupe"
+                            help=(f"Différence avec la moyenne recalculée par le modèle sur un échantillon de "
+                                  f"{batch_size} clients du groupe" if is_sample
+                                  else "Différence avec la moyenne du groupe")
                         )
+                        if is_sample:
+                            st.caption(f"Risque moyen calculé sur un échantillon de {batch_size} clients sur {group_stats['count']}")
                     
                     with col2:
-                        approval_rate = (similar_clients['DECISION'] == 'ACCORD').mean()
+                        approval_rate = group_stats['approval_rate']
                         st.metric(
                             "Taux d'acceptation",
                             f"{approval_rate:.1%}",
@@ -373,7 +580,7 @@ if st.sidebar.button("📊 ANALYSER LE CLIENT", type="primary", use_container_wi
                         )
                     
                     with col3:
-                        default_rate = similar_clients['REAL_TARGET'].mean()
+                        default_rate = group_stats['default_rate']
                         st.metric(
                             "Taux de défaut réel",
                             f"{default_rate:.1%}",
@@ -384,51 +591,56 @@ if st.sidebar.button("📊 ANALYSER LE CLIENT", type="primary", use_container_wi
                 st.subheader("6️⃣ Facteurs influençant la décision")
                 
                 try:
-                    explain_resp = requests.post(f"{API_URL}/explain", json={"features": features}, timeout=10)
-                    if explain_resp.status_code == 200:
-                        explanation = explain_resp.json()
-                        shap_df = pd.DataFrame(explanation["top_features"])
-                        
-                        fig_shap = px.bar(
-                            shap_df.sort_values("impact", key=abs),
-                            x="impact",
-                            y="feature",
-                            orientation='h',
-                            color="direction",
-                            color_discrete_map={"AUGMENTE LE RISQUE": "#FF4B4B", "DIMINUE LE RISQUE": "#00CC00"},
-                            labels={"impact": "Impact SHAP", "feature": "Variable"},
-                            title="Top 10 Facteurs Influençant la Décision"
-                        )
-                        fig_shap.update_layout(height=500, yaxis=dict(autorange="reversed"))
-                        st.plotly_chart(fig_shap, use_container_width=True)
-                        st.caption("Graphique SHAP : Rouge = augmente le risque, Vert = diminue le risque")
-                        
-                        st.info("💡 " + explanation["interpretation"])
-                    else:
-                        st.info("ℹ️ L'explication détaillée des facteurs n'est pas disponible actuellement")
+                    explanation = future_explain.result()
+                    shap_df = pd.DataFrame(explanation["top_features"])
+                    # Tri par impact absolu (argsort NumPy plutôt que sort_values avec key)
+                    shap_order = np.argsort(np.abs(shap_df["impact"].to_numpy(dtype=float)), kind='stable')
+                    
+                    fig_shap = px.bar(
+                        shap_df.iloc[shap_order],
+                        x="impact",
+                        y="feature",
+                        orientation='h',
+                        color="direction",
+                        color_discrete_map={"AUGMENTE LE RISQUE": "#FF4B4B", "DIMINUE LE RISQUE": "#00CC00"},
+                        labels={"impact": "Impact SHAP", "feature": "Variable"},
+                        title="Top 10 Facteurs Influençant la Décision"
+                    )
+                    fig_shap.update_layout(height=500, yaxis=dict(autorange="reversed"))
+                    st.plotly_chart(fig_shap, use_container_width=True)
+                    st.caption("Graphique SHAP : Rouge = augmente le risque, Vert = diminue le risque")
+                    
+                    st.info("💡 " + explanation["interpretation"])
+                except requests.HTTPError:
+                    st.info("ℹ️ L'explication détaillée des facteurs n'est pas disponible actuellement")
                 except:
                     st.info("ℹ️ Feature importance locale non disponible")
                 
                 # SECTION 7 : Interprétation finale
                 st.subheader("7️⃣ Synthèse et recommandations")
                 
+                # Positionnement par recherche binaire sur les risques triés
+                n_risks = len(sorted_risks)
+                share_below = np.searchsorted(sorted_risks, risk, side='left') / n_risks
+                share_above = 1 - np.searchsorted(sorted_risks, risk, side='right') / n_risks
+                
                 if decision == "ACCORD":
                     st.success(f"""
                     ### ✅ Crédit Accordé
                     - **Score de risque** : {risk:.2%} (inférieur au seuil de {OPTIMAL_THRESHOLD:.1%})
-                    - **Positionnement** : Meilleur que {(all_risks > risk).mean():.1%} des clients
+                    - **Positionnement** : Meilleur que {share_above:.1%} des clients
                     - **Recommandation** : Profil à faible risque, crédit approuvé
                     """)
                 else:
                     st.error(f"""
                     ### ❌ Crédit Refusé
                     - **Score de risque** : {risk:.2%} (supérieur au seuil de {OPTIMAL_THRESHOLD:.1%})
-                    - **Positionnement** : Plus risqué que {(all_risks < risk).mean():.1%} des clients
+                    - **Positionnement** : Plus risqué que {share_below:.1%} des clients
                     - **Recommandation** : Profil à risque élevé, crédit non recommandé
                     """)
                 
             else:
-                st.error(f"Erreur API : {response.status_code}")
+                st.error(f"Erreur API : {predict_error}")
                 
         except Exception as e:
             st.error(f"Erreur lors de l'analyse : {str(e)}")